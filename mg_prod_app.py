@@ -1,13 +1,17 @@
 import os
+import io
 import json
 import threading
+import time
 import queue
+from collections import deque
 import socket
 from pathlib import Path
 import yaml
 import streamlit as st
+from PIL import Image, ImageOps
 
-# Optional imports: Vosk and paho-mqtt
+# Optional imports: Vosk, pyaudio and paho-mqtt
 try:
     from vosk import Model, KaldiRecognizer
     VOSK_AVAILABLE = True
@@ -16,6 +20,13 @@ except Exception:
     KaldiRecognizer = None
     VOSK_AVAILABLE = False
 
+try:
+    import pyaudio
+    PYAUDIO_AVAILABLE = True
+except Exception:
+    pyaudio = None
+    PYAUDIO_AVAILABLE = False
+
 try:
     import paho.mqtt.client as mqtt
     MQTT_AVAILABLE = True
@@ -23,6 +34,56 @@ except Exception:
     mqtt = None
     MQTT_AVAILABLE = False
 
+# Streamlit runtime internals, used to notice when a browser session is gone
+try:
+    from streamlit import runtime as st_runtime
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except Exception:
+    st_runtime = None
+    get_script_run_ctx = None
+
+# Optional fast paths: orjson and the libyaml-backed loader
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except Exception:
+    orjson = None
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# st.fragment (experimental_fragment before 1.37) reruns a block on its own,
+# optionally on a timer; on older Streamlit the block simply runs with the
+# rest of the script
+_st_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+def fragment(run_every=None):
+    if _st_fragment is None:
+        return lambda func: func
+    return _st_fragment(run_every=run_every)
+
+def current_session_id():
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    return ctx.session_id if ctx else None
+
+# A websocket drop (network blip, laptop sleep) briefly makes a session
+# inactive while Streamlit keeps it around for reconnection; only treat it as
+# gone after this many seconds (matches Streamlit's disconnected-session TTL)
+SESSION_GRACE_PERIOD = 120
+
+def session_alive(session_id):
+    # Unknown sessions or runtimes are treated as alive
+    if session_id is None or st_runtime is None or not st_runtime.exists():
+        return True
+    try:
+        return st_runtime.get_instance().is_active_session(session_id)
+    except Exception:
+        return True
+
 def safe_base_path():
     try:
         return Path(__file__).parent
@@ -33,59 +94,105 @@ BASE = safe_base_path()
 CFG_PATH = BASE / "config.yaml"
 DEVICES_PATH = BASE / "devices.json"
 
-if CFG_PATH.exists():
-    with open(CFG_PATH, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f) or {}
-else:
-    cfg = {}
+@st.cache_resource(show_spinner=False)
+def load_cfg():
+    if not CFG_PATH.exists():
+        return {}
+    with open(CFG_PATH, "rb") as f:
+        return yaml.load(f, Loader=YAML_LOADER) or {}
+
+@st.cache_resource(show_spinner=False)
+def load_devices():
+    if not DEVICES_PATH.exists():
+        return []
+    try:
+        with open(DEVICES_PATH, "rb") as f:
+            devices_file = json_loads(f.read())
+        devices = devices_file.get("devices", [])
+    except Exception:
+        return []
+    # Serialize toggle payloads once rather than on every button press
+    for dev in devices:
+        dev["_payload"] = json_dumps({"cmd": "toggle", "device": dev.get("name")})
+    return devices
+
+cfg = load_cfg()
 
 APP_NAME = cfg.get("app_name", "MG")
 MODEL_PATH_DEFAULT = cfg.get("vosk_model_path", str(BASE / "model"))
 LOCAL_ONLY_DEFAULT = cfg.get("local_only", True)
 MQTT_BROKER_DEFAULT = cfg.get("mqtt_broker", "mqtt://localhost:1883")
+MQTT_CLIENT_ID = cfg.get("mqtt_client_id") or None
+RECOGNIZER_POOL_SIZE = int(cfg.get("recognizer_pool_size") or os.cpu_count() or 1)
 
 st.set_page_config(page_title=APP_NAME, layout="wide")
 st.title(f"{APP_NAME} - Hybrid Smart Home Assistant")
 
-if DEVICES_PATH.exists():
-    try:
-        with open(DEVICES_PATH, "r", encoding="utf-8") as f:
-            devices_file = json.load(f)
-            devices = devices_file.get("devices", [])
-    except Exception:
-        devices = []
-else:
-    devices = []
+devices = load_devices()
 
-def check_internet(timeout=1.0):
+# Minimal DNS query (id 0x4d47, RD set, one question: root NS)
+DNS_PROBE = b"\x4d\x47\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x01"
+
+@st.cache_data(ttl=5, show_spinner=False)
+def check_internet(timeout=0.2):
+    # One UDP round trip to a public resolver; no TCP handshake to wait on
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.settimeout(timeout)
     try:
-        socket.create_connection(("8.8.8.8", 53), timeout=timeout)
+        s.sendto(DNS_PROBE, ("8.8.8.8", 53))
+        s.recvfrom(512)
         return True
     except OSError:
         return False
+    finally:
+        s.close()
 
 def online_text_processing(text):
     # Replace with actual online AI API call
     return f"Online AI reply: {text}"
 
-def process_text(text):
-    if check_internet():
+def process_text(text, force_local=False):
+    # force_local skips the connectivity probe entirely
+    if not force_local and check_internet():
         return online_text_processing(text)
     else:
         return "Offline response: " + text
 
 from urllib.parse import urlparse
 
+# paho defaults (20 in flight) throttle QoS>0 publishes on high-latency links
+MQTT_MAX_INFLIGHT = 500
+MQTT_MAX_QUEUED = 10000
+# Incoming messages kept for display; older ones are evicted
+MQTT_MESSAGES_MAX = 20
+
+def session_mqtt_client_id():
+    # The broker drops the older of two clients sharing an id, so each browser
+    # session gets its own id derived from the configured prefix
+    if not MQTT_CLIENT_ID:
+        return None
+    session_id = current_session_id()
+    return f"{MQTT_CLIENT_ID}-{session_id}" if session_id else MQTT_CLIENT_ID
+
 class MQTTAdapter:
     def __init__(self, broker_url=MQTT_BROKER_DEFAULT, client_id=None):
         self.broker_url = broker_url
         self.client = None
         self.connected = False
         self.client_id = client_id
+        # mids sent but not yet acknowledged; completed_mids catches acks that
+        # arrive before publish() has recorded the mid
+        self.pending_mids = set()
+        self.completed_mids = set()
+        self.pending_lock = threading.Lock()
         if MQTT_AVAILABLE:
-            self.client = mqtt.Client(client_id)
+            # A persistent session needs a stable client id; paho rejects it otherwise
+            self.client = mqtt.Client(client_id, clean_session=not client_id)
+            self.client.max_inflight_messages_set(MQTT_MAX_INFLIGHT)
+            self.client.max_queued_messages_set(MQTT_MAX_QUEUED)
             self.client.on_connect = self.on_connect
             self.client.on_message = self.on_message
+            self.client.on_publish = self.on_publish
 
     def connect(self):
         if not MQTT_AVAILABLE:
@@ -99,7 +206,7 @@ class MQTTAdapter:
         try:
             if parsed.scheme in ("mqtts", "ssl", "tls"):
                 self.client.tls_set()
-            self.client.connect(host, port)
+            self.client.connect(host, port, keepalive=60)
             self.client.loop_start()
             return True
         except Exception as e:
@@ -109,6 +216,14 @@ class MQTTAdapter:
     def on_connect(self, client, userdata, flags, rc):
         if rc == 0:
             self.connected = True
+            # Disable Nagle so small back-to-back control packets are not delayed;
+            # set here because every reconnect opens a fresh socket
+            try:
+                sock = client.socket()
+                if sock is not None:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                pass
             st.sidebar.success("Connected to MQTT Broker")
             try:
                 client.subscribe("home/devices/#")
@@ -123,14 +238,36 @@ class MQTTAdapter:
         except Exception:
             payload = str(msg.payload)
         if "mqtt_messages" not in st.session_state:
-            st.session_state.mqtt_messages = []
+            st.session_state.mqtt_messages = deque(maxlen=MQTT_MESSAGES_MAX)
         st.session_state.mqtt_messages.append({"topic": msg.topic, "payload": payload})
 
-    def publish(self, topic, message):
+    def on_publish(self, client, userdata, mid):
+        # Runs on paho's network thread, possibly before publish() returns
+        with self.pending_lock:
+            if mid in self.pending_mids:
+                self.pending_mids.discard(mid)
+            else:
+                self.completed_mids.add(mid)
+
+    def publish(self, topic, message, qos=0):
+        # Non-blocking: paho queues the message and on_publish reports completion.
+        # Never hold pending_lock across a paho call: paho invokes on_publish
+        # while holding its own message mutex.
         if self.client and self.connected:
             try:
-                self.client.publish(topic, message)
-                return True
+                info = self.client.publish(topic, message, qos=qos)
+                # While reconnecting paho reports NO_CONN but still queues QoS>0
+                # messages, which are sent (and hit on_publish) once reconnected
+                queued = qos > 0 and info.rc == mqtt.MQTT_ERR_NO_CONN
+                if info.rc != mqtt.MQTT_ERR_SUCCESS and not queued:
+                    st.warning(f"Publish error: {mqtt.error_string(info.rc)}")
+                    return False
+                with self.pending_lock:
+                    if info.mid in self.completed_mids:
+                        self.completed_mids.discard(info.mid)
+                    else:
+                        self.pending_mids.add(info.mid)
+                return info.mid
             except Exception as e:
                 st.warning(f"Publish error: {e}")
                 return False
@@ -147,17 +284,84 @@ class MQTTAdapter:
                 pass
         self.connected = False
 
+@st.cache_resource(show_spinner=False)
+def get_pyaudio():
+    # PortAudio init is slow; share one instance for the process lifetime
+    return pyaudio.PyAudio()
+
+# Keyed by the free-text model path, so keep only one multi-GB model resident
+@st.cache_resource(show_spinner="Loading Vosk model...", max_entries=1)
+def get_vosk_model(path):
+    # Model load dominates start-up cost; Model is safe to share across recognizers
+    return Model(path)
+
+# Recognizers sharing one Model, created on demand up to `size`. Vosk decodes
+# single-threaded per recognizer but releases the GIL, so each checked-out
+# recognizer can run on its own core.
+class RecognizerPool:
+    def __init__(self, model, sample_rate, size):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.size = size
+        self.idle = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Returns None when all `size` recognizers are checked out
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.created >= self.size:
+                return None
+            self.created += 1
+        try:
+            return KaldiRecognizer(self.model, self.sample_rate)
+        except Exception:
+            with self.lock:
+                self.created -= 1
+            raise
+
+    def release(self, recognizer):
+        try:
+            recognizer.Reset()
+        except Exception:
+            # Drop the broken recognizer and free its slot for a replacement
+            with self.lock:
+                self.created -= 1
+            raise
+        self.idle.put(recognizer)
+
+# One pool at a time, so RECOGNIZER_POOL_SIZE stays a process-wide cap
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_recognizer_pool(path, sample_rate):
+    return RecognizerPool(get_vosk_model(path), sample_rate, RECOGNIZER_POOL_SIZE)
+
+# Bound on pending recognizer results; oldest entries are dropped first.
+# Items are recognized text, or ("err", message) tuples.
+RESULT_QUEUE_MAX = 256
+
 class OfflineSpeechRecognizer:
     def __init__(self, model_path: str = MODEL_PATH_DEFAULT, sample_rate: int = 16000):
         self.model_path = model_path
         self.sample_rate = sample_rate
+        # Half-second blocks: matches what Vosk decodes well and keeps the
+        # read/AcceptWaveform rate low
+        self.chunk_frames = sample_rate // 2
         self.model = None
+        self.pool = None
         self.recognizer = None
         self.audio_thread = None
-        self.q = queue.Queue()
+        self.pa = None
+        self.session_id = None
+        self.q = deque(maxlen=RESULT_QUEUE_MAX)
         self.running = False
 
     def start(self):
+        if self.running:
+            return True
         if not VOSK_AVAILABLE:
             st.warning("Vosk not installed. Install vosk and pyaudio to use offline mode.")
             return False
@@ -166,13 +370,29 @@ class OfflineSpeechRecognizer:
             st.error(f"Vosk model missing at '{self.model_path}'. Please download a model and set 'vosk_model_path' in config.yaml.")
             return False
 
+        if not PYAUDIO_AVAILABLE:
+            st.warning("pyaudio not installed. Install pyaudio to capture microphone audio.")
+            return False
+
+        try:
+            self.pa = get_pyaudio()
+        except Exception as e:
+            st.error(f"Failed to initialize audio: {e}")
+            return False
+
         try:
-            self.model = Model(self.model_path)
-            self.recognizer = KaldiRecognizer(self.model, self.sample_rate)
+            self.pool = get_recognizer_pool(self.model_path, self.sample_rate)
+            self.model = self.pool.model
+            self.recognizer = self.pool.acquire()
         except Exception as e:
             st.error(f"Failed to initialize Vosk model: {e}")
             return False
 
+        if self.recognizer is None:
+            st.error(f"All {self.pool.size} recognizers are in use; try again later.")
+            return False
+
+        self.session_id = current_session_id()
         self.running = True
         self.audio_thread = threading.Thread(target=self._listen_audio, daemon=True)
         self.audio_thread.start()
@@ -180,55 +400,67 @@ class OfflineSpeechRecognizer:
 
     def _listen_audio(self):
         try:
-            import pyaudio
-        except Exception as e:
-            self.q.put(json.dumps({"error": f"pyaudio import failed: {e}"}))
-            self.running = False
-            return
-
-        p = pyaudio.PyAudio()
-        try:
-            stream = p.open(format=pyaudio.paInt16, channels=1,
-                            rate=self.sample_rate, input=True, frames_per_buffer=8000)
+            stream = self.pa.open(format=pyaudio.paInt16, channels=1,
+                                  rate=self.sample_rate, input=True, frames_per_buffer=self.chunk_frames)
         except Exception as e:
-            self.q.put(json.dumps({"error": f"Failed to open microphone: {e}"}))
+            self.q.append(("err", f"Failed to open microphone: {e}"))
             self.running = False
-            p.terminate()
+            self._release_recognizer()
             return
 
         stream.start_stream()
         try:
+            # Exit when the owning tab closes without Stop, so the recognizer
+            # returns to the pool instead of leaking with the thread
+            inactive_since = None
             while self.running:
-                data = stream.read(4000, exception_on_overflow=False)
+                if session_alive(self.session_id):
+                    inactive_since = None
+                elif inactive_since is None:
+                    inactive_since = time.monotonic()
+                elif time.monotonic() - inactive_since > SESSION_GRACE_PERIOD:
+                    self.q.append(("err", "Recognition stopped: browser session closed."))
+                    break
+                data = stream.read(self.chunk_frames, exception_on_overflow=False)
                 if self.recognizer.AcceptWaveform(data):
-                    res = self.recognizer.Result()
-                    self.q.put(res)
+                    text = json_loads(self.recognizer.Result()).get("text", "")
+                    if text:
+                        self.q.append(text)
         except Exception as e:
-            self.q.put(json.dumps({"error": f"Audio thread error: {e}"}))
+            self.q.append(("err", f"Audio thread error: {e}"))
         finally:
+            self.running = False
             try:
                 stream.stop_stream()
                 stream.close()
             except Exception:
                 pass
-            p.terminate()
+            self._release_recognizer()
 
-    def get_result(self):
-        try:
-            if not self.q.empty():
-                raw = self.q.get_nowait()
-                try:
-                    parsed = json.loads(raw)
-                    if 'text' in parsed:
-                        return parsed.get('text', '')
-                    elif 'error' in parsed:
-                        return f"[ERROR] {parsed['error']}"
-                    else:
-                        return raw
-                except Exception:
-                    return raw
-        except queue.Empty:
-            return None
+    def _release_recognizer(self):
+        # Called from the audio thread once it no longer touches the recognizer
+        if self.pool and self.recognizer:
+            try:
+                self.pool.release(self.recognizer)
+            except Exception:
+                pass
+        self.recognizer = None
+
+    def get_all(self) -> list[str]:
+        # Drain everything produced since the last rerun
+        out = []
+        while True:
+            try:
+                out.append(self._format_result(self.q.popleft()))
+            except IndexError:
+                break
+        return out
+
+    @staticmethod
+    def _format_result(item):
+        if isinstance(item, tuple):
+            return f"[ERROR] {item[1]}"
+        return item
 
     def stop(self):
         self.running = False
@@ -244,7 +476,52 @@ if "recognizer_running" not in st.session_state:
 if "mqtt_adapter" not in st.session_state:
     st.session_state.mqtt_adapter = None
 if "mqtt_messages" not in st.session_state:
-    st.session_state.mqtt_messages = []
+    st.session_state.mqtt_messages = deque(maxlen=MQTT_MESSAGES_MAX)
+
+# Upper bound on preview dimensions; full-size photos are never sent to the browser
+THUMBNAIL_SIZE = (512, 512)
+
+# Every upload gets a fresh file_id, so bound the process-wide cache
+@st.cache_data(show_spinner=False, max_entries=64)
+def decode_image(file_id, _raw_bytes):
+    # Keyed by the uploader's file_id so the bytes are not rehashed each rerun
+    img = Image.open(io.BytesIO(_raw_bytes))
+    # The re-encoded preview carries no EXIF, so apply the orientation here
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail(THUMBNAIL_SIZE)
+    return img
+
+@fragment()
+def devices_panel():
+    # Toggle clicks rerun only this panel, not the whole script
+    if not devices:
+        return
+    for dev in devices:
+        st.write(f"- **{dev.get('name')}** ({dev.get('type')}) — topic: `{dev.get('topic')}`")
+        if st.button(f"Toggle {dev.get('name')}", key=f"toggle_{dev.get('name')}"):
+            if st.session_state.get("mqtt_adapter") and st.session_state.mqtt_adapter.connected:
+                ok = st.session_state.mqtt_adapter.publish(dev.get('topic'), dev["_payload"])
+                if ok:
+                    st.success(f"Sent toggle to {dev.get('name')}")
+            else:
+                st.warning("MQTT not connected; cannot send command.")
+
+# Seconds between transcript refreshes while the recognizer runs
+TRANSCRIPT_POLL_INTERVAL = 0.5
+
+def transcript_panel():
+    recognizer = st.session_state.get("recognizer")
+    if st.session_state.get("recognizer_running"):
+        if recognizer:
+            results = recognizer.get_all()
+            if results:
+                st.session_state.transcript = " ".join([st.session_state.transcript, *results]).strip()
+        if not (recognizer and recognizer.running):
+            # The audio thread exited on its own (mic failure, audio error,
+            # closed session); rerun the app so the poll timer is dropped
+            st.session_state.recognizer_running = False
+            st.rerun()
+    st.text_area("Transcript", value=st.session_state.transcript, height=200)
 
 col1, col2 = st.columns([1, 2])
 
@@ -254,7 +531,13 @@ with col1:
         for file in uploaded:
             st.write(f"- **{file.name}** ({file.size} bytes)")
             if file.type.startswith("image/"):
-                st.image(file, caption=file.name, use_column_width=True)
+                try:
+                    preview = decode_image(file.file_id, file.getvalue())
+                except (OSError, Image.DecompressionBombError) as e:
+                    # SVG, HEIC or truncated files; keep the rest of the page rendering
+                    st.caption(f"No preview for {file.name}: {e}")
+                else:
+                    st.image(preview, caption=file.name)
 
 with col1:
     st.markdown("---")
@@ -264,7 +547,11 @@ with col1:
     mqtt_broker_input = st.text_input("MQTT broker URL", value=str(MQTT_BROKER_DEFAULT))
 
     if st.button("Start Offline Recognizer"):
-        if st.session_state.recognizer_running:
+        # A rerun interrupted by a double-click can leave an instance running
+        # before recognizer_running was set; reuse it rather than replace it
+        existing = st.session_state.recognizer
+        if existing and existing.running:
+            st.session_state.recognizer_running = True
             st.info("Recognizer already running.")
         else:
             st.session_state.recognizer = OfflineSpeechRecognizer(model_path=model_path_input)
@@ -276,12 +563,12 @@ with col1:
                 st.session_state.recognizer = None
                 st.session_state.recognizer_running = False
 
-        if st.button("Stop Offline Recognizer"):
-            if st.session_state.recognizer:
-                st.session_state.recognizer.stop()
-            st.session_state.recognizer = None
-            st.session_state.recognizer_running = False
-            st.success("Recognizer stopped.")
+    if st.button("Stop Offline Recognizer"):
+        if st.session_state.recognizer:
+            st.session_state.recognizer.stop()
+        st.session_state.recognizer = None
+        st.session_state.recognizer_running = False
+        st.success("Recognizer stopped.")
 
     st.markdown("---")
     st.write("**MQTT**")
@@ -292,7 +579,10 @@ with col1:
             if st.session_state.mqtt_adapter and st.session_state.mqtt_adapter.connected:
                 st.info("Already connected to MQTT broker.")
             else:
-                st.session_state.mqtt_adapter = MQTTAdapter(broker_url=mqtt_broker_input)
+                # A stale adapter may still be auto-reconnecting under the same id
+                if st.session_state.mqtt_adapter:
+                    st.session_state.mqtt_adapter.disconnect()
+                st.session_state.mqtt_adapter = MQTTAdapter(broker_url=mqtt_broker_input, client_id=session_mqtt_client_id())
                 ok = st.session_state.mqtt_adapter.connect()
                 if ok:
                     st.success("MQTT adapter started.")
@@ -308,42 +598,28 @@ with col2:
     user_text = st.text_input("Text input (press Enter to send):", value="")
     if st.button("Send Text"):
         if user_text.strip():
-            if local_only_toggle and not check_internet():
-                reply = "Offline response: " + user_text
-            else:
-                reply = process_text(user_text)
+            reply = process_text(user_text, force_local=local_only_toggle)
             st.text_area("MG Replies:", value=reply, height=200)
 
     st.markdown("### Live transcript (offline recognizer)")
-    transcript_box = st.empty()
-    if st.session_state.get("recognizer") and st.session_state.get("recognizer_running"):
-        res = st.session_state.recognizer.get_result()
-        if res:
-            st.session_state.transcript += (" " + res).strip()
-    transcript_box.text_area("Transcript", value=st.session_state.transcript, height=200)
+    # Poll on a timer while running so the transcript updates without user input
+    poll_every = TRANSCRIPT_POLL_INTERVAL if st.session_state.recognizer_running else None
+    fragment(run_every=poll_every)(transcript_panel)()
 
     st.markdown("### Devices")
-    if devices:
-        for dev in devices:
-            st.write(f"- **{dev.get('name')}** ({dev.get('type')}) — topic: `{dev.get('topic')}`")
-            if st.button(f"Toggle {dev.get('name')}", key=f"toggle_{dev.get('name')}"):
-                payload = json.dumps({"cmd": "toggle", "device": dev.get('name')})
-                if st.session_state.get("mqtt_adapter") and st.session_state.mqtt_adapter.connected:
-                    ok = st.session_state.mqtt_adapter.publish(dev.get('topic'), payload)
-                    if ok:
-                        st.success(f"Sent toggle to {dev.get('name')}")
-                else:
-                    st.warning("MQTT not connected; cannot send command.")
+    devices_panel()
 
     st.markdown("### MQTT Messages (incoming)")
     if st.session_state.mqtt_messages:
-        for m in st.session_state.mqtt_messages[-20:]:
-            st.write(f"- {m['topic']}: {m['payload']}")
+        st.markdown("\n".join(f"- `{m['topic']}`: {m['payload']}" for m in st.session_state.mqtt_messages))
 
+internet_ok = check_internet()
 st.sidebar.title("Status")
 st.sidebar.write(f"- Vosk installed: {VOSK_AVAILABLE}")
 st.sidebar.write(f"- paho-mqtt installed: {MQTT_AVAILABLE}")
-st.sidebar.write(f"- Internet reachable: {check_internet()}")
+st.sidebar.write(f"- Internet reachable: {internet_ok}")
 st.sidebar.write(f"- Recognizer running: {st.session_state.get('recognizer_running', False)}")
 st.sidebar.write(f"- MQTT connected: {st.session_state.get('mqtt_adapter') is not None and st.session_state.get('mqtt_adapter').connected}")
+if st.session_state.get("mqtt_adapter") is not None:
+    st.sidebar.write(f"- MQTT publishes in flight: {len(st.session_state.mqtt_adapter.pending_mids)}")
 st.sidebar.write(f"- Devices loaded: {len(devices)}")